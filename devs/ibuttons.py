@@ -34,22 +34,52 @@ The script is designed to be portable and can be placed in any folder alongside
 #-------------------- libraries used --------------------
 import os 
 import csv
+from array import array
 import re
 import json
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from tqdm import tqdm
-from time import sleep
 import sys
+from itertools import islice, zip_longest
+from functools import lru_cache
+from collections import namedtuple, deque
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+#-------------------- regex patterns, compiled once and shared by every csv file --------------------
+_SAMPLE_RATE_RE = re.compile(r'Sample Rate.*?(\d+)') #first number after "Sample Rate" is the sample rate in minutes
+_UNITS_RE = re.compile(r'(?:High|Low) Temperature Alarm:.*?[-+]?\d+(?:\.\d+)?\s*(°[CF])') #units written next to the alarm temperature
+
+#-------------------- data retreived from a single csv file: timestamps and temperatures are kept in separate sequences --------------------
+ParsedCSV = namedtuple('ParsedCSV', ['timestamps', 'values', 'sample_rate', 'units'])
+
+#-------------------- below this total size the csv files are parsed in the main process, starting the worker processes takes longer than parsing them --------------------
+_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+#-------------------- converts a column number into its excel letter, only a few distinct columns are used so every result is cached --------------------
+@lru_cache(maxsize=None)
+def excel_column_letter(n):
+    result = ""
+    while n > 0:
+        n, remainder = divmod(n - 1, 26) # Convert the number to base-26 ('cause Z -> 26), adjusting by -1 because Excel columns start at 1 (not 0)
+        result = chr(65 + remainder) + result # Convert the remainder to a corresponding ASCII uppercase letter (A=65) and prepend it
+    return result
+
+#-------------------- parameters required in the config file, with their expected type --------------------
+_CONFIG_SCHEMA = {
+    "StartRow": (int, "an integer"),
+    "EndRow": (int, "an integer"),
+    "RepeatLastValue": (bool, "a boolean"),
+    "DaysToProcess": ((list, str), "a list of integers or a string"),
+}
+
 class MacroHandler():
     def __init__(self):
         self.startRow = None
         self.endRow = None
         self.repeatLastValue = None
         self.computeAverage = True
-        self.validateSampleRate = []
-        self.validateUnits = []
         self.sampleRate = None
         self.units = None
         self.daysToProcess = None
@@ -75,23 +105,22 @@ class MacroHandler():
         try:
             with open(config_path, 'r') as f:
                 config = json.load(f) #save all parameters in config
-            required_keys = ["StartRow", "EndRow", "RepeatLastValue", "DaysToProcess"] #all necessary information
-            for key in required_keys:
+            for key in _CONFIG_SCHEMA: #all necessary information
                 if key not in config:
                     raise KeyError(f"Missing required key '{key}' in config file.")
             # validates data types
-            if not isinstance(config["StartRow"], int):
-                raise TypeError("StartRow must be an integer.")
-            if not isinstance(config["EndRow"], int):
-                raise TypeError("EndRow must be an integer.")
-            if not isinstance(config["RepeatLastValue"], bool):
-                raise TypeError("RepeatLastValue must be a boolean.")
-            
-            if not isinstance(config['DaysToProcess'], str):
-                if not isinstance(config["DaysToProcess"], list):
-                    raise TypeError('DaysToProcess must be a list of integers or a string.')
+            for key, (expected_type, description) in _CONFIG_SCHEMA.items():
+                if not isinstance(config[key], expected_type):
+                    raise TypeError(f"{key} must be {description}.")
+            if config["StartRow"] < 1:
+                raise ValueError("StartRow must be a positive integer.")
+            if config["EndRow"] < config["StartRow"]:
+                raise ValueError("EndRow must be greater than or equal to StartRow.")
+            if isinstance(config["DaysToProcess"], list):
                 if not all(isinstance(day, int) and day > 0 for day in config["DaysToProcess"]):
                     raise TypeError("DaysToRepeat numbers must be positive integers")
+            elif config["DaysToProcess"].lower() not in ('all', 'none'): #verify if the string is an allowed command
+                raise ValueError(f'Wrong command! daysToProcess must be "All" to compute average with all days, or "None" if no average is required.')
             
             #save values into attributes
             self.startRow = config.get("StartRow", 0) - 1 #retreive startRow value, is necesarry to substrac 1 to match the csv files row
@@ -104,26 +133,21 @@ class MacroHandler():
             raise RuntimeError(f"Config validation error: {e}")
     #end def
         
-    #-------------------- retrieves sample rate and units from csv file --------------------
-    def get_sample_rate(self, reader):
-        for row in reader: #search in every full-row
-            for cell in row: #search in every individual element inside the row
-                if "Sample Rate" in cell:
-                    match = re.search(r'(\d+)', cell)
-                    if match:
-                        return int(match.group(1)) #return sample rate as integer
-        raise ValueError("Sample rate not found")
+    #-------------------- retrieves sample rate and units from a csv row --------------------
+    def get_sample_rate(self, row):
+        for cell in row: #search in every individual element inside the row
+            match = _SAMPLE_RATE_RE.search(cell)
+            if match:
+                return int(match.group(1)) #return sample rate as integer
+        return None #the row doesn't contain the sample rate
     #end def
     
-    def get_units(self, reader):
-        pattern = re.compile(r'[-+]?\d+(?:\.\d+)?\s*(°[CF])') 
-        for row in reader: #search in every full-row
-            for cell in row: #search in every individual element inside the row
-                if "High Temperature Alarm:" in cell or "Low Temperature Alarm:" in cell:
-                    match = pattern.search(cell)
-                    if match:
-                        return match.group(1) #return units 
-        raise ValueError("Units not found")
+    def get_units(self, row):
+        for cell in row: #search in every individual element inside the row
+            match = _UNITS_RE.search(cell)
+            if match:
+                return match.group(1) #return units 
+        return None #the row doesn't contain the units
     #end def
     
     def extract_time(self, datetime_str: str) -> str:
@@ -133,190 +157,199 @@ class MacroHandler():
             return datetime_str
     #end def
     
-    def get_next_time(self,current_time_str):
-        try:
-            current_time = datetime.strptime(current_time_str, "%H:%M")
-            next_time = current_time + timedelta(minutes=self.sampleRate)
-            return next_time.strftime("%H:%M")
-        except ValueError:
-            raise ValueError(f"Invalid time format: '{current_time_str}'.")
-    
     # -------------------- retreives all the information needed (and specified ) from csv file --------------------
+    # runs in a worker process, so it must not modify any attribute: everything found is returned instead
     def get_data_from_csv(self, full_path: str):
-        clean_data = []
+        timestamps = [] #date/time of every record
+        values = array('d') #temperature of every record, stored as contiguous doubles instead of one float object per record
+        skipped_rows = 0
+        sample_rate = None
+        units = None
         #opens csv file located in the full_path, newline assures a propper reading with EOL, latin1 is used for a special characters
         with open(full_path, newline='', encoding='latin1') as csvfile: 
-            lines = list(csv.reader(csvfile, delimiter=',')) #reads all the content using coma as delimiter, convert object into a list
-        sample_rate = self.get_sample_rate(lines) #retreive the sample rate per csv file
-        self.validateSampleRate.append(sample_rate) #save every sample rate value
-        units = self.get_units(lines) #retreive the sample rate per csv file
-        self.validateUnits.append(units) #save every sample rate value
-        rows_to_process = lines[self.startRow:self.endRow + 1]
-        for row in rows_to_process:
-            #only rows within the margin [startRow, endRow] are processed 
-            try:
-                timestamp = row[0] #retreive date/time value 
-                value = float(row[2]) #retreive numeric value
-                clean_data.append([timestamp, value]) #save information into a clean list
-            except Exception as e:
-                print(f'An error happened with row {row}: {e}')
-        return clean_data #return the list with processed data
+            reader = csv.reader(csvfile, delimiter=',') #rows are streamed one at a time using coma as delimiter, the file is never fully loaded
+            for row in islice(reader, self.startRow): #sample rate and units are always written in the header, above the first data row
+                if sample_rate is None:
+                    sample_rate = self.get_sample_rate(row) #retreive the sample rate per csv file
+                if units is None:
+                    units = self.get_units(row) #retreive the units per csv file
+            #only rows within the margin [startRow, endRow] are processed, islice stops reading the file right after endRow
+            for row in islice(reader, self.endRow - self.startRow + 1):
+                try:
+                    value = float(row[2]) #retreive numeric value
+                except (IndexError, ValueError): #blank or incomplete row, or a value that isn't a number
+                    skipped_rows += 1
+                    continue
+                timestamps.append(row[0]) #retreive date/time value 
+                values.append(value)
+        if skipped_rows:
+            print(f'{skipped_rows} rows without a valid temperature were skipped in {os.path.basename(full_path)}')
+        if sample_rate is None:
+            raise ValueError("Sample rate not found")
+        if units is None:
+            raise ValueError("Units not found")
+        return ParsedCSV(timestamps, values, sample_rate, units) #return the processed data and the metadata to be validated by main
     
-    #-------------------- from information retreive, build the excel file --------------------   
-    def build_xlsx_file(self, dicti: dict, reference_time: str):
+    #-------------------- once every subject sheet is written, adds the average sheet and saves the excel file --------------------   
+    def build_xlsx_file(self, wb, subjects: list, reference_time: str):
         try:
             excel_filename = os.path.join(self.path, 'processedData.xlsx') #excel file's name. Just one file with various sheets
-            if os.path.exists(excel_filename): #verify files existance
-                wb = load_workbook(excel_filename)
-                ws = wb.active
-            else:
-                wb = Workbook()
-                ws = wb.active
-                wb.remove(ws) #remove the default sheet created beacuase other sheets will be created on the fly.
-            for key, value in tqdm(dicti.items(), desc="Building and filling Excel sheets"):
-                sheet_name = str(key)
-                if sheet_name in wb.sheetnames: #verify if the sheet already exists
-                    excel_sheet_per_subject = wb[sheet_name]
-                    excel_sheet_per_subject.delete_rows(1, excel_sheet_per_subject.max_row) #clear all the content to overwrite
-                else:    
-                    excel_sheet_per_subject = wb.create_sheet(title=sheet_name) #create the sheet
-                self.save_raw_data(excel_sheet = excel_sheet_per_subject, data_list = value) #save the raw data
-                self.save_by_experimental_days(excel_sheet = excel_sheet_per_subject, data_list = value) #save the processed values
-                sleep(0.1)
             if self.computeAverage:
-                GA_sheet_name = 'Group Average' #sheet for the computed average
-                if GA_sheet_name in wb.sheetnames:#verify if the sheet already exists
-                    GA_sheet = wb[GA_sheet_name]
-                    GA_sheet.delete_rows(1, GA_sheet.max_row) #clear all the content to overwrite
-                else:
-                    GA_sheet = wb.create_sheet(title='Group Average') #create the sheet
-                self.register_time(excel_sheet=GA_sheet, reference_write=reference_time)
-                for i, key in tqdm(enumerate(dicti.keys(), start=1), total=len(dicti), desc='Calculating average per subject'): #uses key to name the column 
-                    self.compute_average_per_subject(excel_sheet=GA_sheet, title_per_column=key, start_column=i+1)
-                    sleep(0.1)
-                self.compute_average_per_hour(excel_sheet=GA_sheet) #computes average using the data obtained from compute_average_per_subject method
+                GA_sheet = wb.create_sheet(title='Group Average') #sheet for the computed average
+                columns = [self.register_time(reference_write=reference_time)] #first column has the time of every record
+                for key in tqdm(subjects, desc='Calculating average per subject'): #uses key to name the column 
+                    columns.append(self.compute_average_per_subject(title_per_column=key))
+                columns.append(self.compute_average_per_hour(start_column=len(columns)+1)) #computes average using the data obtained from compute_average_per_subject method
+                for row in zip(*columns): #write-only sheets are filled row by row, so columns are transposed
+                    GA_sheet.append(row)
             wb.save(excel_filename)
         except Exception as e:
             raise Exception(e)            
     #end def 
     
-    #-------------------- takes raw data and saves it --------------------
-    def save_raw_data(self, excel_sheet, data_list):
-        excel_sheet.append(["Original CSV values"]) #first row with this string
+    #-------------------- takes raw data, separe it into experimental days and saves raw and processed values in a single pass --------------------
+    def save_subject_sheet(self, excel_sheet, timestamps, values):
+        records_per_day = self.recordsPerDay
+        #if repeatLastValue is true within the config file, the last value in every block is the first of the next one,
+        #so every slice is one record longer. The last block has no next one and its slice just ends with the data
+        block_length = records_per_day + 1 if self.repeatLastValue else records_per_day
+        view = memoryview(values) #slices of a memoryview share the array buffer, so blocks are not copied
+        chunks = [view[i:i+block_length] for i in range(0, len(values), records_per_day)] #creates a list with data devided by blocks with the respective amount of records per day 
+        excel_sheet.append(["Original CSV values", None, None, 'Processed values']) #first row with the title of every section
         excel_sheet.append([f'Units: {self.units}']) #second row with the units
-        excel_sheet.append(['Date/Time', 'Value']) #third row with the title of every column
-        for line in data_list:
-            excel_sheet.append(line) #append every value in the list to the xsxl file
+        excel_sheet.append(['Date/Time', 'Value', None] + [f'Day {day_index}' for day_index in range(1, len(chunks)+1)]) #third row with the title of every column, column C is left blank between raw and processed data
+        #every block becomes a column: zip_longest transposes the blocks into rows, padding the shorter days with None
+        #there are never more processed rows than raw records, so each row holds the raw record plus the measurement of every day at the same offset
+        for raw, processed in zip_longest(zip(timestamps, values), zip_longest(*chunks), fillvalue=()):
+            excel_sheet.append([*raw, None, *processed])
     #end def
     
-    #-------------------- takes raw data, separe it into experimental days and then saves only the measurements in a specific order--------------------
-    def save_by_experimental_days(self, excel_sheet, data_list):       
-        records_per_day = int((24*60)/self.sampleRate) #calculate how much measurements are done per day considering the sample rate
-        self.recordsPerDay = records_per_day
-        chunks = []
-        for i in range(0, len(data_list), records_per_day):
-            chunks.append(data_list[i:i+records_per_day]) #creates a list with data devided by blocks with the respective amount of records per day 
-        if self.repeatLastValue: #if repeatLastValue is true within the config file, the last value in every block is the first of the next one
-            for chunk in range(1, len(chunks)):
-                extra_data = chunks[chunk][0]
-                chunks[chunk-1].append(extra_data)
-        start_col = excel_sheet.max_column + 2 #max_column represents the first available column to use, + 2 leaves a blank column between raw and processed data
-        excel_sheet.cell(row=1, column=start_col, value = 'Processed values') #header for this new section
-        #iterate over every block
-        for day_index, chunk in enumerate(chunks, start=1):
-            col = start_col + (day_index-1)
-            excel_sheet.cell(row = 3, column=col, value = f'Day {day_index}') #writes Day N as header
-            #every measurement is written from row 4 onwards
-            for row_offset, value in enumerate(chunk):
-                excel_sheet.cell(row = 4+row_offset, column=col, value = value[1]) #value[1] is the temperature
-    #end def
-    
-    def register_time(self, excel_sheet, reference_write: str):
-        excel_sheet.cell(row=1, column = 1, value = 'Time')
-        time = reference_write
-        for i in range(1,self.recordsPerDay+1):
-            excel_sheet.cell(row=i+1, column = 1, value = time)
-            time = self.get_next_time(time)
+    def register_time(self, reference_write: str):
+        try:
+            start_time = datetime.strptime(reference_write, "%H:%M") #parsed only once, every other time is an offset from it
+        except ValueError:
+            raise ValueError(f"Invalid time format: '{reference_write}'.")
+        step = timedelta(minutes=self.sampleRate)
+        column = ['Time', reference_write]
+        column.extend((start_time + step*i).strftime("%H:%M") for i in range(1, self.recordsPerDay))
+        return column
     
     ''' every column needs this format =AVERAGE(sheet_name!D4,sheet_name!E4,sheet_name!F4,sheet_name!G4,sheet_name!H4, ...)
         Sheet's name is giving by title_per_column -> =AVERAGE(title_per_column!D4,title_per_column!E4,title_per_column!F4,title_per_column!G4,title_per_column!H4, ...)
         Numbers within self.DaysToProcess represents the column letter, day 1 is D, day 2 is E, and so on, thats why the method  convert_number_to_excel_column is used with offset = 3'''
-    def compute_average_per_subject(self, excel_sheet, title_per_column ,start_column):
-        excel_sheet.cell(row=1, column = start_column, value = title_per_column)
+    def compute_average_per_subject(self, title_per_column):
+        column = [title_per_column]
+        #sheet name and column letter of every day are the same in every row, so they are built once
+        cells = [f"{title_per_column}!{self.convert_number_to_excel_column(n, offset=3)}" for n in self.daysToProcess]
         for i in range(4, self.recordsPerDay + 4):
-            formula = self.build_average_formula_per_subject(self.daysToProcess, title_per_column=title_per_column, row=i)
-            excel_sheet.cell(row=i-2, column = start_column, value = formula)
+            column.append(self.build_average_formula_per_subject(cells, row=i))
+        return column
     #end def
     
     ''' every row in the same column needs this format =AVERAGE(A2:D2)
         The number is within the range between the first row with a value (always 2) till the last value in the row (depends on records per day)
-        First letter is always A, last letter depends on the last column with values, thats why the method convert_number_to_excel_column is used with offset = 0 using max_column as a parameter'''
-    def compute_average_per_hour(self, excel_sheet):
-        start_column = excel_sheet.max_column+1
-        excel_sheet.cell(row = 1, column = start_column, value = 'Group average')
-        last_row = excel_sheet.max_row
-        for i in tqdm(range(2,last_row+1), desc='Calculating average per hour'):
-            formula = self.build_average_formula_per_hour(i, last_column=start_column)
-            excel_sheet.cell(row = i, column = start_column, value = formula)
-            sleep(0.005)
+        First letter is always A, last letter depends on the last column with values, thats why the method convert_number_to_excel_column is used with offset = 0 using start_column as a parameter'''
+    def compute_average_per_hour(self, start_column):
+        column = ['Group average']
+        letter = self.convert_number_to_excel_column(start_column-1, offset=0) #the last subject column is the same for every row
+        for i in tqdm(range(2,self.recordsPerDay+2), desc='Calculating average per hour'):
+            column.append(self.build_average_formula_per_hour(i, letter=letter))
+        return column
     #end def
     
     def convert_number_to_excel_column(self, n, offset):
-        n += offset
-        result = ""
-        while n > 0:
-            n, remainder = divmod(n - 1, 26) # Convert the number to base-26 ('cause Z -> 26), adjusting by -1 because Excel columns start at 1 (not 0)
-            result = chr(65 + remainder) + result # Convert the remainder to a corresponding ASCII uppercase letter (A=65) and prepend it
-        return result
+        return excel_column_letter(n + offset)
     #end def
     
     #-------------------- builds the formula depending if the average computed is per sheet(subject) or per hour (using the average per subject already computed)
-    def build_average_formula_per_subject(self,numbers, title_per_column, row, offset=3):
-        columns = [f"{title_per_column}!{self.convert_number_to_excel_column(n, offset)}{row}" for n in numbers]
-        return f"=AVERAGE({','.join(columns)})"
+    def build_average_formula_per_subject(self, cells, row):
+        return f"=AVERAGE({','.join([f'{cell}{row}' for cell in cells])})"
     #end def
     
-    def build_average_formula_per_hour(self, idx, last_column):
-        letter = self.convert_number_to_excel_column(last_column-1, offset=0)
-        rows = f"=AVERAGE(A{idx}:{letter}{idx})"
-        return rows
+    def build_average_formula_per_hour(self, idx, letter):
+        return f"=AVERAGE(A{idx}:{letter}{idx})"
     #end def
     
-    def main(self):
-        self.printBanner() #prints banner
-        self.get_config() #gets parameters from config file and validates them
-        list_with_all_data = {} #dictionary to store all the data
-        files_in_path = os.listdir(self.path) #list all files within the path
-        csv_files = [file for file in files_in_path if file.lower().endswith('.csv')]
-        for file in tqdm(csv_files, desc="Reading CSV files"):
-            full_path = os.path.join(self.path, file)  # create the full path
-            data = self.get_data_from_csv(full_path=full_path)  # retrieve data
-            file_key = os.path.splitext(file)[0]  # remove .csv extension
-            list_with_all_data[file_key] = data  # store in dict
-            sleep(0.1)
-        if len(set(self.validateSampleRate)) == 1: #evaluate if all the sample rates are the same
-            self.sampleRate = self.validateSampleRate[0]
-        else:
-            raise ValueError(f'Different sample rates found in csv files')
-        if len(set(self.validateUnits)) == 1: #evaluates all the units are the same
-            self.units = self.validateUnits[0]
-        else:
-            raise ValueError(f'Different units found in csv files: {self.validateUnits}')
+    #-------------------- checks DaysToProcess against the experimental days requested in the config file --------------------
+    def validate_days_to_process(self):
         total_records = self.endRow - self.startRow + 1 #estimates total records requested in config file
-        records_per_day = int((24 * 60) / self.sampleRate) 
-        total_days = (total_records + records_per_day - 1) // records_per_day #estimates how many experimental days are included within total_records
+        total_days = (total_records + self.recordsPerDay - 1) // self.recordsPerDay #estimates how many experimental days are included within total_records
         if not isinstance(self.daysToProcess, str):    #verify if a string was written in the config file
             if not all(day <= total_days for day in self.daysToProcess): #verify if any number specified in DaysToProcess parameter is higher than total_days
                 raise ValueError(f"One or more values in daysToReport exceed the number of experimental days ({total_days}).")
-        else: #verify if the string is an allowed command
-            if self.daysToProcess.lower() == 'all':
-                self.daysToProcess = list(range(1, total_days+1)) #includes all the experimental days
-            elif self.daysToProcess.lower() == 'none':
-                self.computeAverage = False #skips average computation
-            else:
-                raise ValueError(f'Wrong command! daysToProcess must be "All" to compute average with all days, or "None" if no average is required.')
-        start_time = self.extract_time(list_with_all_data[list(list_with_all_data.keys())[0]][0][0]) #gets date/time from the first row, then extract only the hour    
-        self.build_xlsx_file(dicti=list_with_all_data, reference_time=start_time) #creates and writes in the xsxl file
+        elif self.daysToProcess.lower() == 'all':
+            self.daysToProcess = list(range(1, total_days+1)) #includes all the experimental days
+        else: #"None", any other command was already rejected by get_config
+            self.computeAverage = False #skips average computation
+    #end def
+    
+    #-------------------- parses every csv file and yields them in the same order as csv_files, so the sheet order is kept --------------------
+    def read_csv_files(self, csv_files: list):
+        workers = min(len(csv_files), os.cpu_count() or 1, 61) #one process per csv file, limited by the available cores. Windows doesn't allow more than 61 workers
+        if workers == 1 or sum(entry.stat().st_size for entry in csv_files) < _PARALLEL_MIN_BYTES:
+            for file in csv_files:
+                yield file, self.get_data_from_csv(file.path)
+            return
+        files_to_submit = iter(csv_files)
+        in_flight = deque() #files being parsed
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            #every csv file is independent, so they are parsed in parallel. Only one file per worker is submitted at a time,
+            #otherwise parsed files would pile up in memory while the sheets are written
+            try:
+                for file in islice(files_to_submit, workers):
+                    in_flight.append((file, executor.submit(self.get_data_from_csv, file.path)))
+                while in_flight:
+                    file, future = in_flight.popleft()
+                    yield file, future.result()
+                    del future #the written data is released before the next file is submitted
+                    next_file = next(files_to_submit, None)
+                    if next_file is not None:
+                        in_flight.append((next_file, executor.submit(self.get_data_from_csv, next_file.path)))
+            except BaseException: #GeneratorExit included, raised when main stops reading because of an error
+                executor.shutdown(cancel_futures=True) #files still waiting for a worker are not parsed
+                raise
+    #end def
+    
+    def main(self):
+        self.printBanner() #prints banner
+        self.get_config() #gets parameters from config file and validates them
+        with os.scandir(self.path) as entries: #list all files within the path, every entry already has its full path
+            csv_files = [entry for entry in entries if entry.is_file() and entry.name.lower().endswith('.csv')]
+        if not csv_files:
+            raise FileNotFoundError(f'No csv files found in {self.path}')
+        wb = Workbook(write_only=True) #rows are streamed to disk, the file is rebuilt from scratch on every run
+        subjects = [] #name of every sheet written, used to compute the average
+        start_time = None
+        parsed_files = self.read_csv_files(csv_files)
+        try:
+            with tqdm(total=len(csv_files), desc="Reading CSV files and filling Excel sheets") as progress:
+                for file, parsed in parsed_files:
+                    #every file is validated against the first one as soon as it is parsed
+                    if self.sampleRate is None:
+                        self.sampleRate = parsed.sample_rate
+                        self.recordsPerDay = (24*60) // self.sampleRate #calculate how much measurements are done per day considering the sample rate, it is the same for every file
+                        self.validate_days_to_process() #fails before the remaining files are read if DaysToProcess doesn't fit the experimental days
+                    elif parsed.sample_rate != self.sampleRate:
+                        raise ValueError(f'Different sample rates found in csv files: {self.sampleRate} and {parsed.sample_rate} ({file.name})')
+                    if self.units is None:
+                        self.units = parsed.units
+                    elif parsed.units != self.units:
+                        raise ValueError(f'Different units found in csv files: {self.units} and {parsed.units} ({file.name})')
+                    file_key = os.path.splitext(file.name)[0]  # remove .csv extension
+                    if start_time is None:
+                        start_time = self.extract_time(parsed.timestamps[0]) #gets date/time from the first row, then extract only the hour
+                    #each sheet is written as soon as its file is parsed
+                    self.save_subject_sheet(excel_sheet = wb.create_sheet(title=file_key), timestamps = parsed.timestamps, values = parsed.values) #save raw and processed values in a single pass
+                    subjects.append(file_key)
+                    del parsed #the written data is released before the next file is read
+                    progress.update()
+            self.build_xlsx_file(wb=wb, subjects=subjects, reference_time=start_time) #adds the average sheet and saves the xsxl file
+        except Exception:
+            parsed_files.close() #stops the worker processes, if any
+            for excel_sheet in wb.worksheets: #the workbook won't be saved, sheets not written yet are closed so only the real error is shown
+                if not excel_sheet.closed:
+                    excel_sheet.close()
+            raise
     #end def
     
     
@@ -325,6 +358,7 @@ def main():
     macro.main()
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() #required by the worker processes when running as a frozen executable
     try:
         main()
     except Exception as e: